@@ -11,6 +11,29 @@ DB_NAME = "feb_db"
 COLLECTION_PLAYERS_STATS = "FEB3_players_statistics"
 COLLECTION_TEAMS_STATS = "FEB3_teams_statistics"
 COLLECTION_PLAYERS_SHOTS = "FEB3_players_shots"
+MONGO_BATCH_SIZE = 10_000  # Documents per lot del cursor (el driver en porta 101 per defecte)
+MONGO_MAX_POOL_SIZE = 50
+MONGO_MIN_POOL_SIZE = 4
+MONGO_COMPRESSORS = 'zstd,snappy,zlib'  # Compressió del protocol (s'usa la primera disponible)
+MONGO_ZLIB_COMPRESSION_LEVEL = 6
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 3000  # Falla ràpid si el servidor no respon
+MONGO_CONNECT_TIMEOUT_MS = 3000
+MONGO_APP_NAME = 'feb-etl'  # Identifica el pipeline als logs i al profiler del servidor
+
+# Índexs compostos per als filtres de l'extracció i el $lookup de rivals
+# (el $lookup només consulta la col·lecció d'equips)
+PLAYERS_STATS_INDEXES = [
+    [('season_id', 1), ('competition_name', 1), ('minutes', 1)],
+]
+TEAMS_STATS_INDEXES = [
+    [('season_id', 1), ('competition_name', 1)],
+    [('match_feb_id', 1), ('team_feb_id', 1)],
+]
+
+# Columnes de text repetides que es carreguen com a 'category'.
+# IMPORTANT: els groupby sobre aquestes columnes han d'usar observed=True
+# per no generar grups buits per categories no presents.
+CATEGORICAL_COLUMNS = ['player_feb_id', 'player_name', 'season_id', 'competition_name']
 
 # Filtres de dades
 DEFAULT_SEASON = "2024-2025"
@@ -38,6 +61,18 @@ INTERIOR_ZONES_ATTEMPTED = ['rc_pc_a', 'rc_pl_a', 'rc_pr_a', 'rc_mbl_a', 'rc_mbr
 EXTERIOR_ZONES_MADE = ['rc_mel_m', 'rc_mer_m', 'rc_c3l_m', 'rc_c3r_m', 'rc_ce3l_m', 'rc_ce3r_m', 'rc_e3l_m', 'rc_e3r_m']
 EXTERIOR_ZONES_ATTEMPTED = ['rc_mel_a', 'rc_mer_a', 'rc_c3l_a', 'rc_c3r_a', 'rc_ce3l_a', 'rc_ce3r_a', 'rc_e3l_a', 'rc_e3r_a']
 
+# Camps de FEB3_players_statistics que usa el pipeline: la resta no surt de MongoDB
+PLAYER_STATS_PROJECTION = list(dict.fromkeys(
+    ['player_feb_id', 'player_name', 'match_feb_id', 'team_feb_id', 'minutes',
+     'orb', 'drb', 'pf']
+    + STATS_TO_NORMALIZE
+    + INTERIOR_ZONES_MADE + INTERIOR_ZONES_ATTEMPTED
+    + EXTERIOR_ZONES_MADE + EXTERIOR_ZONES_ATTEMPTED
+))
+
+# Camps de FEB3_teams_statistics necessaris per calcular possessions i DER
+TEAM_STATS_PROJECTION = ['match_feb_id', 'team_feb_id', 'fga', 'fta', 'orb', 'tov', 'pts']
+
 # Features per clustering
 # NOTA: interior_pct eliminada (r=0.97 amb fg2_pct - multicolinealitat severa)
 # NOTA: interior_freq eliminada (r=0.92 amb usage_2p - duplicació)
@@ -58,18 +93,25 @@ FEATURES_FOR_EDA = [
     'exterior_pct', 'exterior_freq',
 ]
 
+# Llistes de features precalculades per ETLPipeline.transform (amb i sense DER)
+CLUSTERING_FEATURES_WITH_DER = list(dict.fromkeys(FEATURES_FOR_CLUSTERING + ['der']))
+CLUSTERING_FEATURES_WITHOUT_DER = [f for f in FEATURES_FOR_CLUSTERING if f != 'der']
+AGGREGATION_FEATURES_WITH_DER = list(dict.fromkeys(CLUSTERING_FEATURES_WITH_DER + FEATURES_FOR_EDA))
+AGGREGATION_FEATURES_WITHOUT_DER = list(dict.fromkeys(CLUSTERING_FEATURES_WITHOUT_DER + FEATURES_FOR_EDA))
+
 # Rutes del projecte
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 RAW_DATA_DIR = DATA_DIR / "raw"
+EXTRACT_CACHE_DIR = PROCESSED_DATA_DIR / ".cache"
 MODELS_DIR = BASE_DIR / "models"
 NOTEBOOKS_DIR = BASE_DIR / "notebooks"
 
 # Noms dels arxius de sortida
-OUTPUT_SCALED_FILE = "players_features_scaled.csv"
-OUTPUT_RAW_FILE = "players_features_raw.csv"
-OUTPUT_AGGREGATED_FILE = "players_aggregated.csv"
+OUTPUT_SCALED_FILE = "players_features_scaled.parquet"
+OUTPUT_RAW_FILE = "players_features_raw.parquet"
+OUTPUT_AGGREGATED_FILE = "players_aggregated.parquet"
 
 # Configuració de visualització
 PLOT_STYLE = 'seaborn-v0_8-darkgrid'
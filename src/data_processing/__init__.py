@@ -1,7 +1,16 @@
 """
 Mòdul de processament de dades.
 Responsabilitat: ETL, neteja i transformació de dades.
+
+Requereix pandas >= 2.0 amb Copy-on-Write: els filtres retornen vistes i la
+còpia només es fa quan una transformació posterior escriu sobre el DataFrame.
 """
+import pandas as pd
+
+# Copy-on-Write és el comportament per defecte (i únic) a partir de pandas 3.0
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
 from .data_loader import DataLoader
 from .data_cleaner import DataCleaner
 from .feature_engineer import FeatureEngineer
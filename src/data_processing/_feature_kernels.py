@@ -0,0 +1,66 @@
+"""
+Kernels numèrics per a les mètriques d'eficiència.
+Principi SRP: Única responsabilitat de calcular possessions, OER, TS% i DER sobre arrays.
+
+Si Numba està disponible els kernels es compilen (paral·lels i en memòria cau);
+si no, s'usa una implementació equivalent amb NumPy.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _possessions_loop(fga, fta, orb, tov, ft_factor, out):
+    """Calcula Possessions = FGA + ft_factor × FTA - ORB + TOV fila a fila."""
+    for i in prange(fga.shape[0]):
+        out[i] = fga[i] + ft_factor * fta[i] - orb[i] + tov[i]
+
+
+def _rating_loop(pts, poss, multiplier, out):
+    """
+    Calcula multiplier × punts / possessions fila a fila (0 si possessions <= 0).
+    
+    Serveix tant per l'OER (punts propis) com pel DER (punts i possessions del rival).
+    """
+    for i in prange(pts.shape[0]):
+        out[i] = multiplier * pts[i] / poss[i] if poss[i] > 0 else 0.0
+
+
+def _true_shooting_loop(pts, fga, fta, ft_factor, out):
+    """Calcula TS% = PTS / (2 × (FGA + ft_factor × FTA)) fila a fila (0 si no hi ha tirs)."""
+    for i in prange(pts.shape[0]):
+        ts_attempts = 2.0 * (fga[i] + ft_factor * fta[i])
+        out[i] = pts[i] / ts_attempts if ts_attempts > 0 else 0.0
+
+
+def _possessions_numpy(fga, fta, orb, tov, ft_factor, out):
+    """Equivalent NumPy de _possessions_loop quan Numba no està disponible."""
+    out[:] = fga + ft_factor * fta - orb + tov
+
+
+def _rating_numpy(pts, poss, multiplier, out):
+    """Equivalent NumPy de _rating_loop quan Numba no està disponible."""
+    out[:] = 0
+    np.divide(multiplier * pts, poss, out=out, where=poss > 0)
+
+
+def _true_shooting_numpy(pts, fga, fta, ft_factor, out):
+    """Equivalent NumPy de _true_shooting_loop quan Numba no està disponible."""
+    ts_attempts = 2 * (fga + ft_factor * fta)
+    out[:] = 0
+    np.divide(pts, ts_attempts, out=out, where=ts_attempts > 0)
+
+
+# Sense fastmath: les dades del rival poden contenir NaN (partits sense rival)
+if NUMBA_AVAILABLE:
+    compute_possessions = njit(parallel=True, cache=True)(_possessions_loop)
+    compute_rating = njit(parallel=True, cache=True)(_rating_loop)
+    compute_true_shooting = njit(parallel=True, cache=True)(_true_shooting_loop)
+else:
+    compute_possessions = _possessions_numpy
+    compute_rating = _rating_numpy
+    compute_true_shooting = _true_shooting_numpy
@@ -39,25 +39,22 @@ class DataAggregator:
             if 'minutes_played' in df.columns:
                 agg_dict['minutes_played'] = 'sum'
             
-            df_agg = df.groupby(player_id_col).agg(agg_dict).reset_index()
+            df_agg = df.groupby(player_id_col, sort=False, as_index=False,
+                                observed=True).agg(agg_dict)
             logger.info(f"Dades agregades (mitjana simple): {len(df)} registres -> {len(df_agg)} jugadors")
         else:
-            # Mitjana ponderada per minuts
-            def weighted_mean(group, features):
-                result = {player_name_col: group[player_name_col].iloc[0]}
-                total_minutes = group['minutes_played'].sum()
-                
-                for col in features:
-                    if col in group.columns:
-                        result[col] = (group[col] * group['minutes_played']).sum() / total_minutes
-                
-                result['minutes_played'] = total_minutes
-                return pd.Series(result)
-            
-            df_agg = df.groupby(player_id_col).apply(
-                lambda x: weighted_mean(x, features)
-            ).reset_index()
-            
+            # Mitjana ponderada per minuts (vectoritzada: sum(x·w) / sum(w) per jugador)
+            cols = [col for col in features if col in df.columns]
+            grouped = df.groupby(player_id_col, sort=False, observed=True)
+            weighted_sums = df[cols].mul(df['minutes_played'], axis=0).groupby(
+                df[player_id_col], sort=False, observed=True).sum()
+            total_minutes = grouped['minutes_played'].sum()
+
+            df_agg = weighted_sums.div(total_minutes, axis=0)
+            df_agg.insert(0, player_name_col, grouped[player_name_col].first())
+            df_agg['minutes_played'] = total_minutes
+            df_agg = df_agg.reset_index()
+
             logger.info(f"Dades agregades (mitjana ponderada per minuts): {len(df)} registres -> {len(df_agg)} jugadors")
         
         return df_agg
@@ -81,11 +78,13 @@ class DataAggregator:
         Returns:
             DataFrame agregat amb totals
         """
-        agg_dict = {col: 'sum' for col in raw_stats if col in df.columns}
-        agg_dict[player_name_col] = 'first'
-        agg_dict['num_games'] = 'size'  # Nombre de partits
+        cols = [col for col in raw_stats if col in df.columns]
+        grouped = df.groupby(player_id_col, sort=False, observed=True)
+        df_agg = grouped[cols].sum()
         
-        df_agg = df.groupby(player_id_col).agg(agg_dict).reset_index()
+        df_agg.insert(0, player_name_col, grouped[player_name_col].first())
+        df_agg['num_games'] = grouped.size()  # Nombre de partits
+        df_agg = df_agg.reset_index()
         
         logger.info(f"Estadístiques RAW agregades: {len(df)} registres -> {len(df_agg)} jugadors")
         return df_agg
@@ -105,6 +104,7 @@ class DataAggregator:
         Returns:
             DataFrame agregat
         """
-        df_agg = df.groupby(group_by_col).agg(agg_dict).reset_index()
+        df_agg = df.groupby(group_by_col, sort=False, as_index=False,
+                            observed=True).agg(agg_dict)
         logger.info(f"Agregació personalitzada completada: {len(df_agg)} grups")
         return df_agg
@@ -49,12 +49,17 @@ class DataCleaner:
         """
         initial_count = len(df)
         
+        # Una única màscara combinada: el DataFrame només es copia una vegada
+        mask = np.ones(len(df), dtype=bool)
         for col, ranges in validations.items():
             if col in df.columns:
+                values = df[col].to_numpy()
                 if 'min' in ranges:
-                    df = df[df[col] >= ranges['min']]
+                    mask &= values >= ranges['min']
                 if 'max' in ranges:
-                    df = df[df[col] <= ranges['max']]
+                    mask &= values <= ranges['max']
+        
+        df = df.loc[mask]
         
         removed = initial_count - len(df)
         if removed > 0:
@@ -74,19 +79,47 @@ class DataCleaner:
         Returns:
             DataFrame amb percentatges vàlids
         """
-        for col in pct_cols:
-            if col in df.columns:
-                # Marcar valors invàlids
-                invalid_mask = (df[col] < 0) | (df[col] > 1)
-                invalid_count = invalid_mask.sum()
-                
-                if invalid_count > 0:
-                    logger.warning(f"Columna '{col}': {invalid_count} valors fora de [0, 1]")
-                    # Clip a 0-1
-                    df[col] = df[col].clip(0, 1)
+        present = [col for col in pct_cols if col in df.columns]
+        if not present:
+            return df
+        
+        # Marcar valors invàlids de totes les columnes alhora
+        block = df[present].to_numpy(copy=True)
+        invalid_counts = ((block < 0) | (block > 1)).sum(axis=0)
+        
+        for col, invalid_count in zip(present, invalid_counts):
+            if invalid_count > 0:
+                logger.warning(f"Columna '{col}': {invalid_count} valors fora de [0, 1]")
+        
+        if invalid_counts.any():
+            # Clip a 0-1 en una sola passada i una sola assignació, conservant
+            # el dtype original de cada columna (to_numpy promou float32 a float64)
+            np.clip(block, 0, 1, out=block)
+            df[present] = pd.DataFrame(block, index=df.index,
+                                       columns=present).astype(df[present].dtypes)
         
         return df
     
+    @staticmethod
+    def _remove_unused_categories(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Elimina les categories sense files de les columnes categòriques.
+        
+        Després de filtrar, els jugadors descartats continuarien sent categories:
+        apareixerien com a grups buits als groupby sense observed=True i es
+        desarien als arxius de sortida.
+        
+        Args:
+            df: DataFrame filtrat
+            
+        Returns:
+            DataFrame amb només les categories observades
+        """
+        cat_cols = df.select_dtypes(include='category').columns
+        if len(cat_cols) == 0:
+            return df
+        return df.assign(**{col: df[col].cat.remove_unused_categories() for col in cat_cols})
+    
     @staticmethod
     def filter_by_minutes(df: pd.DataFrame, min_minutes: float = 0) -> pd.DataFrame:
         """
@@ -100,7 +133,7 @@ class DataCleaner:
             DataFrame filtrat
         """
         initial_count = len(df)
-        df_filtered = df[df['minutes'] > min_minutes].copy()
+        df_filtered = DataCleaner._remove_unused_categories(df[df['minutes'] > min_minutes])
         removed = initial_count - len(df_filtered)
         
         logger.info(f"Filtrats {removed} registres amb minuts <= {min_minutes}")
@@ -120,15 +153,16 @@ class DataCleaner:
         Returns:
             DataFrame filtrat
         """
-        games_per_player = df.groupby(player_id_col).size().reset_index(name='num_games')
-        valid_players = games_per_player[games_per_player['num_games'] >= min_games][player_id_col]
-        
-        initial_count = df[player_id_col].nunique()
-        df_filtered = df[df[player_id_col].isin(valid_players)].copy()
-        final_count = df_filtered[player_id_col].nunique()
-        
-        logger.info(f"Filtrats jugadors: {initial_count} -> {final_count} "
-                   f"(mínim {min_games} partits)")
+        # Partits de cada jugador a nivell de fila: una sola passada de groupby
+        games_per_row = df.groupby(player_id_col, sort=False,
+                                   observed=True)[player_id_col].transform('size')
+        df_filtered = DataCleaner._remove_unused_categories(df.loc[games_per_row >= min_games])
+        
+        if logger.isEnabledFor(logging.INFO):
+            initial_count = df[player_id_col].nunique()
+            final_count = df_filtered[player_id_col].nunique()
+            logger.info(f"Filtrats jugadors: {initial_count} -> {final_count} "
+                       f"(mínim {min_games} partits)")
         return df_filtered
     
     @staticmethod
@@ -145,16 +179,24 @@ class DataCleaner:
         Returns:
             DataFrame sense valors nuls
         """
-        initial_nulls = df.isnull().sum().sum()
+        if strategy not in ('drop', 'fill'):
+            raise ValueError(f"Estratègia no vàlida: {strategy}")
+        
+        # Cas habitual: cap nul, s'evita recomptar i copiar el DataFrame
+        null_mask = df.isna().to_numpy()
+        if not null_mask.any():
+            logger.info(f"Valors nuls: 0 -> 0 (estratègia: {strategy})")
+            return df
+        
+        initial_nulls = int(null_mask.sum())
         
         if strategy == 'drop':
             df_clean = df.dropna()
-        elif strategy == 'fill':
-            df_clean = df.fillna(fill_value)
+            final_nulls = 0
         else:
-            raise ValueError(f"Estratègia no vàlida: {strategy}")
+            df_clean = df.fillna(fill_value)
+            final_nulls = int(df_clean.isna().to_numpy().sum())
         
-        final_nulls = df_clean.isnull().sum().sum()
         logger.info(f"Valors nuls: {initial_nulls} -> {final_nulls} (estratègia: {strategy})")
         
         return df_clean
@@ -2,11 +2,17 @@
 Carregador de dades des de MongoDB.
 Principi SRP: Única responsabilitat de carregar dades des de la base de dades.
 """
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import pandas as pd
+import pyarrow as pa
 import logging
 
 from ..database import MongoDBClient
+from ..config import (
+    COLLECTION_PLAYERS_STATS, COLLECTION_TEAMS_STATS, COLLECTION_PLAYERS_SHOTS,
+    CATEGORICAL_COLUMNS, MONGO_BATCH_SIZE, PLAYER_STATS_PROJECTION,
+    TEAM_STATS_PROJECTION, FREE_THROW_POSSESSION_FACTOR
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,56 +29,199 @@ class DataLoader:
         """
         self.mongo_client = mongo_client
     
-    def load_players_statistics(self, query: Optional[Dict] = None) -> pd.DataFrame:
+    def _load_collection(self, collection_name: str, 
+                         query: Optional[Dict] = None,
+                         pipeline: Optional[List[Dict]] = None,
+                         projection: Optional[Dict] = None,
+                         batch_size: int = MONGO_BATCH_SIZE) -> pd.DataFrame:
+        """
+        Carrega una consulta des de MongoDB.
+        
+        Args:
+            collection_name: Nom de la col·lecció
+            query: Filtre de cerca MongoDB
+            pipeline: Pipeline d'agregació; si es proporciona s'usa en lloc de find
+            projection: Projecció de camps del find
+            batch_size: Documents per lot del cursor
+            
+        Returns:
+            DataFrame amb els documents
+        """
+        try:
+            if pipeline is not None:
+                table = self.mongo_client.aggregate_arrow(collection_name, pipeline,
+                                                          batch_size=batch_size)
+            else:
+                table = self.mongo_client.find_arrow(collection_name, query, projection,
+                                                     batch_size=batch_size)
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logger.warning(f"Tipus mixtos als documents, construint DataFrame sense Arrow: {e}")
+            if pipeline is not None:
+                documents = self.mongo_client.aggregate(collection_name, pipeline,
+                                                        batch_size=batch_size)
+            else:
+                documents = self.mongo_client.find(collection_name, query, projection,
+                                                   batch_size=batch_size)
+            df = pd.DataFrame(documents)
+        
+        return self._to_categorical(df)
+    
+    @staticmethod
+    def _to_categorical(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converteix les columnes de CATEGORICAL_COLUMNS a dtype 'category'.
+        
+        Els groupby posteriors treballen sobre codis enters en lloc de
+        cadenes. Cal usar observed=True en agrupar per aquestes columnes.
+        
+        Args:
+            df: DataFrame carregat
+            
+        Returns:
+            DataFrame amb columnes categòriques
+        """
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df
+    
+    @staticmethod
+    def _projection(fields: Optional[Iterable[str]]) -> Optional[Dict]:
+        """
+        Construeix una projecció MongoDB que només inclou els camps indicats.
+        
+        Args:
+            fields: Camps a incloure (None per incloure'ls tots)
+            
+        Returns:
+            Diccionari de projecció, o None
+        """
+        if fields is None:
+            return None
+        projection = {'_id': 0}
+        projection.update({field: 1 for field in fields})
+        return projection
+    
+    def load_players_statistics(self, query: Optional[Dict] = None,
+                                fields: Optional[List[str]] = PLAYER_STATS_PROJECTION,
+                                batch_size: int = MONGO_BATCH_SIZE) -> pd.DataFrame:
         """
         Carrega estadístiques de jugadors.
         
+        El filtratge per minuts i partits es fa després amb DataCleaner.
+        
         Args:
             query: Filtre de cerca MongoDB
+            fields: Camps a llegir de MongoDB (None per llegir-los tots)
+            batch_size: Documents per lot del cursor
             
         Returns:
             DataFrame amb estadístiques de jugadors
         """
-        from ..config import COLLECTION_PLAYERS_STATS
-        
-        data = self.mongo_client.find(COLLECTION_PLAYERS_STATS, query)
-        df = pd.DataFrame(data)
+        projection = self._projection(fields)
+        df = self._load_collection(COLLECTION_PLAYERS_STATS, query, projection=projection,
+                                   batch_size=batch_size)
         
         logger.info(f"Carregats {len(df)} registres de jugadors")
         return df
     
-    def load_teams_statistics(self, query: Optional[Dict] = None) -> pd.DataFrame:
+    @staticmethod
+    def _build_teams_opponents_pipeline(query: Optional[Dict],
+                                        projection: Optional[Dict] = None) -> List[Dict]:
+        """
+        Construeix la pipeline que calcula possessions i uneix el rival de cada partit.
+        
+        Possessions = FGA + 0.44 × FTA - ORB + TOV, calculades al servidor tant
+        per l'equip com pel rival (mateix match_feb_id, diferent team_feb_id).
+        Només es retornen els camps necessaris per al càlcul del DER.
+        
+        Args:
+            query: Filtre de cerca MongoDB
+            projection: Projecció de camps de l'equip (s'aplica just després del filtre)
+            
+        Returns:
+            Llista d'etapes de la pipeline
+        """
+        def possessions(prefix: str) -> Dict:
+            return {'$add': [f'${prefix}fga',
+                             {'$multiply': [FREE_THROW_POSSESSION_FACTOR, f'${prefix}fta']},
+                             {'$subtract': [0, f'${prefix}orb']},
+                             f'${prefix}tov']}
+        
+        pipeline = [{'$match': query or {}}]
+        if projection is not None:
+            pipeline.append({'$project': projection})
+        
+        return pipeline + [
+            {'$lookup': {
+                'from': COLLECTION_TEAMS_STATS,
+                'localField': 'match_feb_id',
+                'foreignField': 'match_feb_id',
+                'as': 'opp',
+            }},
+            {'$addFields': {'opp': {'$filter': {
+                'input': '$opp',
+                'cond': {'$ne': ['$$this.team_feb_id', '$team_feb_id']},
+            }}}},
+            # Només partits amb exactament un rival
+            {'$match': {'opp': {'$size': 1}}},
+            {'$unwind': '$opp'},
+            {'$project': {
+                '_id': 0,
+                'match_feb_id': 1,
+                'team_feb_id': 1,
+                'pts': 1,
+                'team_possessions': possessions(''),
+                'opponent_possessions': possessions('opp.'),
+                'opponent_pts': '$opp.pts',
+            }},
+        ]
+    
+    def load_teams_statistics(self, query: Optional[Dict] = None,
+                              with_opponents: bool = False,
+                              fields: Optional[List[str]] = TEAM_STATS_PROJECTION,
+                              batch_size: int = MONGO_BATCH_SIZE) -> pd.DataFrame:
         """
         Carrega estadístiques d'equips.
         
+        Amb with_opponents=True, MongoDB calcula les possessions de cada equip i
+        hi afegeix 'opponent_possessions' i 'opponent_pts' del rival del partit,
+        retornant només els camps necessaris per al DER.
+        
         Args:
             query: Filtre de cerca MongoDB
+            with_opponents: Si True, uneix les dades del rival al servidor
+            fields: Camps a llegir de MongoDB (None per llegir-los tots)
+            batch_size: Documents per lot del cursor
             
         Returns:
             DataFrame amb estadístiques d'equips
         """
-        from ..config import COLLECTION_TEAMS_STATS
+        projection = self._projection(fields)
+        pipeline = None
+        if with_opponents:
+            pipeline = self._build_teams_opponents_pipeline(query, projection)
         
-        data = self.mongo_client.find(COLLECTION_TEAMS_STATS, query)
-        df = pd.DataFrame(data)
+        df = self._load_collection(COLLECTION_TEAMS_STATS, query, pipeline, projection,
+                                   batch_size=batch_size)
         
         logger.info(f"Carregats {len(df)} registres d'equips")
         return df
     
-    def load_players_shots(self, query: Optional[Dict] = None) -> pd.DataFrame:
+    def load_players_shots(self, query: Optional[Dict] = None,
+                           batch_size: int = MONGO_BATCH_SIZE) -> pd.DataFrame:
         """
         Carrega dades de tirs de jugadors.
         
         Args:
             query: Filtre de cerca MongoDB
+            batch_size: Documents per lot del cursor
             
         Returns:
             DataFrame amb dades de tirs
         """
-        from ..config import COLLECTION_PLAYERS_SHOTS
-        
-        data = self.mongo_client.find(COLLECTION_PLAYERS_SHOTS, query)
-        df = pd.DataFrame(data)
+        df = self._load_collection(COLLECTION_PLAYERS_SHOTS, query, batch_size=batch_size)
         
         logger.info(f"Carregats {len(df)} registres de tirs")
         return df
@@ -4,11 +4,30 @@ Principi SRP: Única responsabilitat de crear i transformar característiques.
 """
 import pandas as pd
 import numpy as np
+from typing import Optional, Tuple
 import logging
 
+from ..config import FREE_THROW_POSSESSION_FACTOR, EFFICIENCY_MULTIPLIER
+from ._feature_kernels import compute_possessions, compute_rating, compute_true_shooting
+
 logger = logging.getLogger(__name__)
 
 
+def _safe_divide(num: np.ndarray, den: np.ndarray,
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Divisió element a element que retorna 0 on el denominador no és positiu.
+    
+    Només divideix on den > 0 (evita calcular num/den sobre zeros i els
+    RuntimeWarning associats). Si es passa `out`, el resultat s'hi escriu.
+    """
+    if out is None:
+        out = np.zeros(np.shape(num), dtype=np.result_type(num, den, np.float32))
+    else:
+        out[...] = 0
+    return np.divide(num, den, out=out, where=den > 0)
+
+
 class FeatureEngineer:
     """Crea i transforma característiques per anàlisi."""
     
@@ -30,6 +49,26 @@ class FeatureEngineer:
         logger.info(f"Creada columna '{new_col}' des de '{seconds_col}'")
         return df
     
+    @staticmethod
+    def _per_minutes_block(df: pd.DataFrame, cols: list, minutes_col: str,
+                           target_minutes: int,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calcula la matriu d'estadístiques normalitzades per minuts (float32).
+        
+        Args:
+            df: DataFrame
+            cols: Columnes a normalitzar (han d'existir)
+            minutes_col: Columna amb minuts jugats
+            target_minutes: Minuts de referència
+            out: Matriu de sortida (n_files, len(cols)), opcional
+            
+        Returns:
+            Matriu amb les estadístiques normalitzades
+        """
+        scale = target_minutes / df[minutes_col].to_numpy(np.float32)
+        return np.multiply(df[cols].to_numpy(np.float32), scale[:, None], out=out)
+    
     @staticmethod
     def normalize_per_minutes(df: pd.DataFrame, stats_cols: list, 
                              minutes_col: str = 'minutes_played', 
@@ -46,12 +85,16 @@ class FeatureEngineer:
         Returns:
             DataFrame amb estadístiques normalitzades
         """
-        for stat in stats_cols:
-            if stat in df.columns:
-                new_col = f'{stat}_per{target_minutes}'
-                df[new_col] = (df[stat] / df[minutes_col]) * target_minutes
+        cols = [stat for stat in stats_cols if stat in df.columns]
+        per_minutes = FeatureEngineer._per_minutes_block(df, cols, minutes_col, target_minutes)
         
-        logger.info(f"Normalitzades {len(stats_cols)} estadístiques a {target_minutes} minuts")
+        # Una sola inserció de bloc en lloc d'una assignació per columna
+        # (les columnes que ja existeixin es reemplacen, no es dupliquen)
+        df_new = pd.DataFrame(per_minutes, index=df.index,
+                              columns=[f'{stat}_per{target_minutes}' for stat in cols])
+        df = pd.concat([df.drop(columns=df_new.columns, errors='ignore'), df_new], axis=1)
+        
+        logger.info(f"Normalitzades {len(cols)} estadístiques a {target_minutes} minuts")
         return df
     
     @staticmethod
@@ -65,9 +108,9 @@ class FeatureEngineer:
         Returns:
             DataFrame amb percentatges calculats
         """
-        df['fg2_pct'] = np.where(df['2pa'] > 0, df['2pm'] / df['2pa'], 0)
-        df['fg3_pct'] = np.where(df['3pa'] > 0, df['3pm'] / df['3pa'], 0)
-        df['ft_pct'] = np.where(df['fta'] > 0, df['ftm'] / df['fta'], 0)
+        df['fg2_pct'] = _safe_divide(df['2pm'].to_numpy(), df['2pa'].to_numpy())
+        df['fg3_pct'] = _safe_divide(df['3pm'].to_numpy(), df['3pa'].to_numpy())
+        df['ft_pct'] = _safe_divide(df['ftm'].to_numpy(), df['fta'].to_numpy())
         
         logger.info("Calculats percentatges de tir (FG2%, FG3%, FT%)")
         return df
@@ -83,12 +126,33 @@ class FeatureEngineer:
         Returns:
             DataFrame amb taxes d'ús
         """
-        df['usage_2p'] = np.where(df['fga'] > 0, df['2pa'] / df['fga'], 0)
-        df['usage_3p'] = np.where(df['fga'] > 0, df['3pa'] / df['fga'], 0)
+        fga = df['fga'].to_numpy()
+        df['usage_2p'] = _safe_divide(df['2pa'].to_numpy(), fga)
+        df['usage_3p'] = _safe_divide(df['3pa'].to_numpy(), fga)
         
         logger.info("Calculades taxes d'ús de tir (2P, 3P)")
         return df
     
+    @staticmethod
+    def _zone_sums(df: pd.DataFrame, zones_made: list,
+                   zones_attempted: list) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula els tirs anotats i intentats totals d'un grup de zones.
+        
+        Es recalculen a cada crida (mai es llegeixen de columnes ja existents),
+        de manera que no poden quedar desfasats respecte a les zones.
+        
+        Args:
+            df: DataFrame
+            zones_made: Columnes de tirs anotats
+            zones_attempted: Columnes de tirs intentats
+            
+        Returns:
+            Tupla (anotats, intentats)
+        """
+        return (df[zones_made].to_numpy().sum(axis=1),
+                df[zones_attempted].to_numpy().sum(axis=1))
+    
     @staticmethod
     def calculate_interior_stats(df: pd.DataFrame, 
                                  zones_made: list, 
@@ -102,15 +166,16 @@ class FeatureEngineer:
             zones_attempted: Columnes de tirs intentats en zones interiors
             
         Returns:
-            DataFrame amb estadístiques de tir interior
+            DataFrame amb estadístiques de tir interior i totals interior_made / interior_att
         """
-        interior_made = df[zones_made].sum(axis=1)
-        interior_attempted = df[zones_attempted].sum(axis=1)
+        interior_made, interior_attempted = FeatureEngineer._zone_sums(
+            df, zones_made, zones_attempted)
         
-        df['interior_pct'] = np.where(interior_attempted > 0, 
-                                       interior_made / interior_attempted, 0)
-        df['interior_freq'] = np.where(df['fga'] > 0, 
-                                        interior_attempted / df['fga'], 0)
+        # Totals reutilitzables (p. ex. per l'EDA) sense tornar a sumar les zones
+        df['interior_made'] = interior_made
+        df['interior_att'] = interior_attempted
+        df['interior_pct'] = _safe_divide(interior_made, interior_attempted)
+        df['interior_freq'] = _safe_divide(interior_attempted, df['fga'].to_numpy())
         
         logger.info("Calculades estadístiques de tir interior")
         return df
@@ -128,19 +193,34 @@ class FeatureEngineer:
             zones_attempted: Columnes de tirs intentats en zones exteriors
             
         Returns:
-            DataFrame amb estadístiques de tir exterior
+            DataFrame amb estadístiques de tir exterior i totals exterior_made / exterior_att
         """
-        exterior_made = df[zones_made].sum(axis=1)
-        exterior_attempted = df[zones_attempted].sum(axis=1)
+        exterior_made, exterior_attempted = FeatureEngineer._zone_sums(
+            df, zones_made, zones_attempted)
         
-        df['exterior_pct'] = np.where(exterior_attempted > 0, 
-                                       exterior_made / exterior_attempted, 0)
-        df['exterior_freq'] = np.where(df['fga'] > 0, 
-                                        exterior_attempted / df['fga'], 0)
+        # Totals reutilitzables (p. ex. per l'EDA) sense tornar a sumar les zones
+        df['exterior_made'] = exterior_made
+        df['exterior_att'] = exterior_attempted
+        df['exterior_pct'] = _safe_divide(exterior_made, exterior_attempted)
+        df['exterior_freq'] = _safe_divide(exterior_attempted, df['fga'].to_numpy())
         
         logger.info("Calculades estadístiques de tir exterior")
         return df
     
+    @staticmethod
+    def _float32_columns(df: pd.DataFrame, cols: list) -> list:
+        """
+        Retorna les columnes indicades com a arrays float32 contigus per als kernels.
+        
+        Args:
+            df: DataFrame
+            cols: Noms de les columnes
+            
+        Returns:
+            Llista d'arrays float32, en el mateix ordre que cols
+        """
+        return [np.ascontiguousarray(df[col].to_numpy(dtype=np.float32)) for col in cols]
+    
     @staticmethod
     def calculate_possessions(df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -161,14 +241,10 @@ class FeatureEngineer:
         Returns:
             DataFrame amb possessions calculades
         """
-        from ..config import FREE_THROW_POSSESSION_FACTOR
-        
-        df['possessions'] = (
-            df['fga'] + 
-            (FREE_THROW_POSSESSION_FACTOR * df['fta']) - 
-            df['orb'] + 
-            df['tov']
-        )
+        fga, fta, orb, tov = FeatureEngineer._float32_columns(df, ['fga', 'fta', 'orb', 'tov'])
+        possessions = np.empty(len(df), dtype=np.float32)
+        compute_possessions(fga, fta, orb, tov, FREE_THROW_POSSESSION_FACTOR, possessions)
+        df['possessions'] = possessions
         
         logger.info("Calculades possessions per jugador")
         return df
@@ -186,13 +262,10 @@ class FeatureEngineer:
         Returns:
             DataFrame amb OER calculat
         """
-        from ..config import EFFICIENCY_MULTIPLIER
-        
-        df['oer'] = np.where(
-            df['possessions'] > 0,
-            EFFICIENCY_MULTIPLIER * (df['pts'] / df['possessions']),
-            0
-        )
+        pts, possessions = FeatureEngineer._float32_columns(df, ['pts', 'possessions'])
+        oer = np.empty(len(df), dtype=np.float32)
+        compute_rating(pts, possessions, EFFICIENCY_MULTIPLIER, oer)
+        df['oer'] = oer
         
         logger.info("Calculat OER (Offensive Efficiency Rating)")
         return df
@@ -210,15 +283,10 @@ class FeatureEngineer:
         Returns:
             DataFrame amb TS% calculat
         """
-        from ..config import FREE_THROW_POSSESSION_FACTOR
-        
-        true_shooting_attempts = 2 * (df['fga'] + FREE_THROW_POSSESSION_FACTOR * df['fta'])
-        
-        df['true_shooting_pct'] = np.where(
-            true_shooting_attempts > 0,
-            df['pts'] / true_shooting_attempts,
-            0
-        )
+        pts, fga, fta = FeatureEngineer._float32_columns(df, ['pts', 'fga', 'fta'])
+        ts = np.empty(len(df), dtype=np.float32)
+        compute_true_shooting(pts, fga, fta, FREE_THROW_POSSESSION_FACTOR, ts)
+        df['true_shooting_pct'] = ts
         
         logger.info("Calculat True Shooting % (TS%)")
         return df
@@ -239,17 +307,131 @@ class FeatureEngineer:
         Returns:
             DataFrame amb DER calculat
         """
-        from ..config import EFFICIENCY_MULTIPLIER
-        
-        df['der'] = np.where(
-            df['opponent_possessions'] > 0,
-            EFFICIENCY_MULTIPLIER * (df['opponent_pts'] / df['opponent_possessions']),
-            0
-        )
+        opp_pts, opp_poss = FeatureEngineer._float32_columns(
+            df, ['opponent_pts', 'opponent_possessions'])
+        der = np.empty(len(df), dtype=np.float32)
+        compute_rating(opp_pts, opp_poss, EFFICIENCY_MULTIPLIER, der)
+        df['der'] = der
         
         logger.info("Calculat DER (Defensive Efficiency Rating)")
         return df
     
+    @staticmethod
+    def _derived_columns(df: pd.DataFrame,
+                         exterior_zones_made: list = None,
+                         exterior_zones_attempted: list = None) -> list:
+        """
+        Retorna els noms de les característiques derivades que es calcularan.
+        
+        Args:
+            df: DataFrame amb estadístiques del jugador
+            exterior_zones_made: Zones exteriors (anotats), opcional
+            exterior_zones_attempted: Zones exteriors (intentats), opcional
+            
+        Returns:
+            Llista ordenada de columnes derivades
+        """
+        cols = ['fg2_pct', 'fg3_pct', 'ft_pct', 'usage_2p', 'usage_3p',
+                'interior_made', 'interior_att', 'interior_pct', 'interior_freq']
+        
+        # Zones exteriors (si es proporcionen les columnes)
+        if exterior_zones_made and exterior_zones_attempted:
+            cols += ['exterior_made', 'exterior_att', 'exterior_pct', 'exterior_freq']
+        
+        cols += ['possessions', 'oer', 'true_shooting_pct']
+        
+        # DER només si existeixen dades del rival
+        if 'opponent_possessions' in df.columns and 'opponent_pts' in df.columns:
+            cols.append('der')
+        
+        return cols
+    
+    @staticmethod
+    def _compute_all_derived(df: pd.DataFrame,
+                             interior_zones_made: list,
+                             interior_zones_attempted: list,
+                             exterior_zones_made: list = None,
+                             exterior_zones_attempted: list = None,
+                             out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calcula totes les característiques derivades en una sola passada.
+        
+        Equivalent a encadenar calculate_shooting_percentages, calculate_usage_rates,
+        calculate_interior_stats, calculate_exterior_stats, calculate_possessions,
+        calculate_oer, calculate_true_shooting_pct i calculate_der, però llegint
+        les columnes d'entrada una única vegada a una matriu NumPy i escrivint
+        els resultats directament a una matriu de sortida, en l'ordre de
+        _derived_columns.
+        
+        Args:
+            df: DataFrame amb estadístiques del jugador
+            interior_zones_made: Zones interiors (anotats)
+            interior_zones_attempted: Zones interiors (intentats)
+            exterior_zones_made: Zones exteriors (anotats), opcional
+            exterior_zones_attempted: Zones exteriors (intentats), opcional
+            out: Matriu de sortida (n_files, n_derivades), opcional
+            
+        Returns:
+            Matriu float32 amb les característiques derivades
+        """
+        names = FeatureEngineer._derived_columns(df, exterior_zones_made,
+                                                 exterior_zones_attempted)
+        if out is None:
+            out = np.empty((len(df), len(names)), dtype=np.float32, order='F')
+        res = {name: out[:, i] for i, name in enumerate(names)}
+        has_exterior = 'exterior_pct' in res
+        has_opponent = 'der' in res
+        
+        cols = ['fga', '2pa', '2pm', '3pa', '3pm', 'fta', 'ftm', 'pts', 'orb', 'tov']
+        cols += list(interior_zones_made) + list(interior_zones_attempted)
+        if has_exterior:
+            cols += list(exterior_zones_made) + list(exterior_zones_attempted)
+        if has_opponent:
+            cols += ['opponent_pts', 'opponent_possessions']
+        
+        arr = df[cols].to_numpy(dtype=np.float32)
+        pos = {col: i for i, col in enumerate(cols)}
+        
+        def col(name):
+            return arr[:, pos[name]]
+        
+        def zone_sum(zones, out):
+            # Cada suma de zones es calcula una sola vegada, directament a la
+            # columna de sortida, i es reutilitza per als percentatges i freqüències
+            return arr[:, [pos[z] for z in zones]].sum(axis=1, out=out)
+        
+        fga, fta, pts = col('fga'), col('fta'), col('pts')
+        _safe_divide(col('2pm'), col('2pa'), out=res['fg2_pct'])
+        _safe_divide(col('3pm'), col('3pa'), out=res['fg3_pct'])
+        _safe_divide(col('ftm'), fta, out=res['ft_pct'])
+        _safe_divide(col('2pa'), fga, out=res['usage_2p'])
+        _safe_divide(col('3pa'), fga, out=res['usage_3p'])
+        
+        interior_made = zone_sum(interior_zones_made, res['interior_made'])
+        interior_attempted = zone_sum(interior_zones_attempted, res['interior_att'])
+        _safe_divide(interior_made, interior_attempted, out=res['interior_pct'])
+        _safe_divide(interior_attempted, fga, out=res['interior_freq'])
+        
+        if has_exterior:
+            exterior_made = zone_sum(exterior_zones_made, res['exterior_made'])
+            exterior_attempted = zone_sum(exterior_zones_attempted, res['exterior_att'])
+            _safe_divide(exterior_made, exterior_attempted, out=res['exterior_pct'])
+            _safe_divide(exterior_attempted, fga, out=res['exterior_freq'])
+        
+        # Mètriques avançades amb kernels fila a fila (Numba si està disponible)
+        compute_possessions(fga, fta, col('orb'), col('tov'),
+                            FREE_THROW_POSSESSION_FACTOR, res['possessions'])
+        compute_rating(pts, res['possessions'], EFFICIENCY_MULTIPLIER, res['oer'])
+        compute_true_shooting(pts, fga, fta, FREE_THROW_POSSESSION_FACTOR,
+                              res['true_shooting_pct'])
+        
+        if has_opponent:
+            compute_rating(col('opponent_pts'), col('opponent_possessions'),
+                           EFFICIENCY_MULTIPLIER, res['der'])
+        
+        logger.info(f"Calculades {len(names)} característiques derivades en una passada")
+        return out
+    
     @staticmethod
     def apply_all_transformations(df: pd.DataFrame, stats_to_normalize: list,
                                   interior_zones_made: list,
@@ -273,26 +455,33 @@ class FeatureEngineer:
             DataFrame transformat
         """
         df = FeatureEngineer.convert_seconds_to_minutes(df)
-        df = FeatureEngineer.normalize_per_minutes(df, stats_to_normalize, 
-                                                   target_minutes=target_minutes)
-        df = FeatureEngineer.calculate_shooting_percentages(df)
-        df = FeatureEngineer.calculate_usage_rates(df)
-        df = FeatureEngineer.calculate_interior_stats(df, interior_zones_made, 
-                                                       interior_zones_attempted)
         
-        # Zones exteriors (si es proporcionen les columnes)
-        if exterior_zones_made and exterior_zones_attempted:
-            df = FeatureEngineer.calculate_exterior_stats(df, exterior_zones_made,
-                                                          exterior_zones_attempted)
-        
-        # Mètriques avançades
-        df = FeatureEngineer.calculate_possessions(df)
-        df = FeatureEngineer.calculate_oer(df)
-        df = FeatureEngineer.calculate_true_shooting_pct(df)
-        
-        # DER només si existeixen dades del rival
-        if 'opponent_possessions' in df.columns and 'opponent_pts' in df.columns:
-            df = FeatureEngineer.calculate_der(df)
+        per_minute_cols = [stat for stat in stats_to_normalize if stat in df.columns]
+        derived_cols = FeatureEngineer._derived_columns(df, exterior_zones_made,
+                                                        exterior_zones_attempted)
+        new_cols = [f'{stat}_per{target_minutes}' for stat in per_minute_cols] + derived_cols
+        n_per_minute = len(per_minute_cols)
+        
+        # Bloc de sortida preassignat (ordre F: cada columna contigua) per afegir
+        # totes les columnes noves amb un únic concat
+        out = np.empty((len(df), len(new_cols)), dtype=np.float32, order='F')
+        FeatureEngineer._per_minutes_block(df, per_minute_cols, 'minutes_played',
+                                           target_minutes, out=out[:, :n_per_minute])
+        FeatureEngineer._compute_all_derived(df, interior_zones_made,
+                                             interior_zones_attempted,
+                                             exterior_zones_made,
+                                             exterior_zones_attempted,
+                                             out=out[:, n_per_minute:])
+        
+        # Les columnes que ja existeixin es reemplacen, no es dupliquen
+        df_new = pd.DataFrame(out, columns=new_cols, index=df.index, copy=False)
+        df = pd.concat([df.drop(columns=new_cols, errors='ignore'), df_new], axis=1)
+        logger.info(f"Normalitzades {n_per_minute} estadístiques a {target_minutes} minuts")
+        
+        # float32 és suficient per a estadístiques de bàsquet i redueix a la meitat
+        # la memòria de l'agregació, l'escalat i el clustering posteriors
+        float_cols = df.select_dtypes('float64').columns
+        df[float_cols] = df[float_cols].astype(np.float32)
         
         logger.info("Totes les transformacions de característiques aplicades")
         return df
@@ -2,14 +2,112 @@
 Client MongoDB per connexió i consultes a la base de dades.
 Principi SRP: Única responsabilitat de gestionar la connexió i consultes a MongoDB.
 """
-from typing import Dict, List, Optional
-from pymongo import MongoClient
+from typing import Any, Dict, Iterable, List, Optional
+import atexit
+import pyarrow as pa
+from pymongo import MongoClient, IndexModel
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
 from pymongo.database import Database
 from pymongo.collection import Collection
 import logging
 
+from ..config import (
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_COMPRESSORS,
+    MONGO_ZLIB_COMPRESSION_LEVEL, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS, MONGO_APP_NAME
+)
+
+try:
+    from pymongoarrow.api import Schema, aggregate_arrow_all, find_arrow_all
+    PYMONGOARROW_AVAILABLE = True
+except ImportError:
+    PYMONGOARROW_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Un MongoClient per URI compartit per tot el procés: cada client manté el seu
+# propi pool de connexions, que així es reutilitza entre instàncies i execucions.
+_SHARED_CLIENTS: Dict[str, MongoClient] = {}
+
+
+def _get_shared_client(uri: str) -> MongoClient:
+    """
+    Retorna el MongoClient compartit per una URI, creant-lo si cal.
+    
+    Args:
+        uri: URI de connexió a MongoDB
+        
+    Returns:
+        Client de pymongo amb pool de connexions
+    """
+    client = _SHARED_CLIENTS.get(uri)
+    if client is None:
+        client = MongoClient(uri, maxPoolSize=MONGO_MAX_POOL_SIZE,
+                             minPoolSize=MONGO_MIN_POOL_SIZE,
+                             compressors=MONGO_COMPRESSORS,
+                             zlibCompressionLevel=MONGO_ZLIB_COMPRESSION_LEVEL,
+                             serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                             connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                             appname=MONGO_APP_NAME)
+        _SHARED_CLIENTS[uri] = client
+    return client
+
+
+@atexit.register
+def _close_shared_clients():
+    """Tanca els clients compartits (i els seus pools) en acabar el procés."""
+    while _SHARED_CLIENTS:
+        _, client = _SHARED_CLIENTS.popitem()
+        client.close()
+
+
+def _cursor_to_arrow(cursor: Iterable[Dict],
+                     schema: Optional[Dict[str, Any]] = None) -> pa.Table:
+    """
+    Construeix una taula Arrow columna a columna recorrent el cursor.
+    
+    Cada document es consumeix i es descarta en llegir-lo: no es crea cap
+    llista intermèdia de diccionaris.
+    
+    Args:
+        cursor: Iterable de documents (cursor de pymongo)
+        schema: Camps i tipus Arrow a conservar (None per inferir-los tots)
+        
+    Returns:
+        Taula Arrow amb els documents
+        
+    Raises:
+        pa.ArrowInvalid: Si un camp té tipus incompatibles entre documents
+    """
+    data: Dict[str, list] = {}
+    n_docs = 0
+    
+    for doc in cursor:
+        kept = 0
+        for key, value in doc.items():
+            if schema is not None and key not in schema:
+                continue
+            if key == '_id':
+                value = str(value)  # ObjectId no és representable a Arrow
+            values = data.get(key)
+            if values is None:
+                values = data[key] = [None] * n_docs
+            values.append(value)
+            kept += 1
+        n_docs += 1
+        
+        # Documents amb camps absents: omplir amb nuls per mantenir la longitud
+        if kept != len(data):
+            for values in data.values():
+                if len(values) < n_docs:
+                    values.append(None)
+    
+    if schema is None:
+        return pa.Table.from_pydict(data)
+    
+    columns = {field: data.get(field, [None] * n_docs) for field in schema}
+    return pa.Table.from_pydict(columns, schema=pa.schema(list(schema.items())))
+
 
 class MongoDBClient:
     """Client per interactuar amb MongoDB."""
@@ -31,24 +129,43 @@ class MongoDBClient:
         """
         Estableix connexió amb MongoDB.
         
+        No es fa cap ping: pymongo connecta de manera mandrosa i, si el servidor
+        no és accessible, la primera consulta falla amb ServerSelectionTimeoutError
+        en MONGO_SERVER_SELECTION_TIMEOUT_MS.
+        
         Returns:
-            True si la connexió és exitosa, False en cas contrari
+            True si el client s'ha pogut crear (URI vàlida), False en cas contrari
         """
         try:
-            self._client = MongoClient(self.uri)
+            self._client = _get_shared_client(self.uri)
             self._db = self._client[self.db_name]
-            self._client.admin.command('ping')
-            logger.info(f"Connexió exitosa a MongoDB: {self.db_name}")
+            logger.info("Client MongoDB preparat: %s", self.db_name)
             return True
         except Exception as e:
-            logger.error(f"Error connectant a MongoDB: {e}")
+            logger.error("Error connectant a MongoDB: %s", e)
             return False
     
     def disconnect(self):
-        """Tanca la connexió amb MongoDB."""
+        """
+        Allibera la connexió amb MongoDB.
+        
+        El client compartit no es tanca: el seu pool es reutilitza en la
+        següent connexió amb la mateixa URI.
+        """
         if self._client:
-            self._client.close()
-            logger.info("Connexió a MongoDB tancada")
+            self._client = None
+            self._db = None
+            logger.info("Connexió a MongoDB alliberada")
+    
+    @property
+    def is_connected(self) -> bool:
+        """
+        Indica si hi ha una connexió establerta.
+        
+        Returns:
+            True si connect() ha tingut èxit i no s'ha alliberat la connexió
+        """
+        return self._db is not None
     
     @property
     def db(self) -> Database:
@@ -109,7 +226,8 @@ class MongoDBClient:
         return collection.count_documents(query)
     
     def find(self, collection_name: str, query: Optional[Dict] = None, 
-             projection: Optional[Dict] = None, limit: int = 0) -> List[Dict]:
+             projection: Optional[Dict] = None, limit: int = 0,
+             batch_size: int = 0) -> List[Dict]:
         """
         Cerca documents en una col·lecció.
         
@@ -118,19 +236,127 @@ class MongoDBClient:
             query: Filtre de cerca
             projection: Projecció de camps
             limit: Límit de resultats (0 = sense límit)
+            batch_size: Documents per lot del cursor (0 = valor per defecte del driver)
             
         Returns:
             Llista de documents
         """
         collection = self.get_collection(collection_name)
         query = query or {}
-        cursor = collection.find(query, projection)
+        cursor = collection.find(query, projection, batch_size=batch_size)
         
         if limit > 0:
             cursor = cursor.limit(limit)
         
         return list(cursor)
     
+    def aggregate(self, collection_name: str, pipeline: List[Dict],
+                  allow_disk_use: bool = True, batch_size: int = 0) -> List[Dict]:
+        """
+        Executa una pipeline d'agregació al servidor.
+        
+        Args:
+            collection_name: Nom de la col·lecció
+            pipeline: Etapes de l'agregació
+            allow_disk_use: Permet usar disc per etapes grans ($group, $sort)
+            batch_size: Documents per lot del cursor (0 = valor per defecte del driver)
+            
+        Returns:
+            Llista de documents resultants
+        """
+        collection = self.get_collection(collection_name)
+        options = {'allowDiskUse': allow_disk_use}
+        if batch_size > 0:
+            options['batchSize'] = batch_size
+        return list(collection.aggregate(pipeline, **options))
+    
+    def find_arrow(self, collection_name: str, query: Optional[Dict] = None,
+                   projection: Optional[Dict] = None,
+                   schema: Optional[Dict[str, Any]] = None,
+                   batch_size: int = 0) -> pa.Table:
+        """
+        Cerca documents i els retorna directament com a taula Arrow.
+        
+        Usa pymongoarrow si està instal·lat (BSON -> Arrow sense objectes Python);
+        si no, construeix la taula en streaming des del cursor.
+        
+        Args:
+            collection_name: Nom de la col·lecció
+            query: Filtre de cerca
+            projection: Projecció de camps
+            schema: Camps i tipus Arrow ({camp: pa.DataType}); None per inferir-los
+            batch_size: Documents per lot del cursor (0 = valor per defecte del driver)
+            
+        Returns:
+            Taula Arrow amb els documents
+        """
+        collection = self.get_collection(collection_name)
+        query = query or {}
+        options = {'batch_size': batch_size} if batch_size > 0 else {}
+        
+        if PYMONGOARROW_AVAILABLE:
+            return find_arrow_all(collection, query,
+                                  schema=Schema(schema) if schema else None,
+                                  projection=projection, **options)
+        
+        return _cursor_to_arrow(collection.find(query, projection, **options), schema)
+    
+    def aggregate_arrow(self, collection_name: str, pipeline: List[Dict],
+                        schema: Optional[Dict[str, Any]] = None,
+                        allow_disk_use: bool = True, batch_size: int = 0) -> pa.Table:
+        """
+        Executa una pipeline d'agregació i retorna el resultat com a taula Arrow.
+        
+        Args:
+            collection_name: Nom de la col·lecció
+            pipeline: Etapes de l'agregació
+            schema: Camps i tipus Arrow ({camp: pa.DataType}); None per inferir-los
+            allow_disk_use: Permet usar disc per etapes grans ($group, $sort)
+            batch_size: Documents per lot del cursor (0 = valor per defecte del driver)
+            
+        Returns:
+            Taula Arrow amb els documents resultants
+        """
+        collection = self.get_collection(collection_name)
+        options = {'allowDiskUse': allow_disk_use}
+        if batch_size > 0:
+            options['batchSize'] = batch_size
+        
+        if PYMONGOARROW_AVAILABLE:
+            return aggregate_arrow_all(collection, pipeline,
+                                       schema=Schema(schema) if schema else None,
+                                       **options)
+        
+        return _cursor_to_arrow(collection.aggregate(pipeline, **options), schema)
+    
+    def ensure_indexes(self, collection_name: str,
+                       index_specs: List[List[tuple]]) -> List[str]:
+        """
+        Crea els índexs indicats si encara no existeixen (operació idempotent).
+        
+        Args:
+            collection_name: Nom de la col·lecció
+            index_specs: Llista d'índexs, cadascun com a llista de parelles (camp, direcció)
+            
+        Returns:
+            Noms dels índexs, o llista buida si no s'han pogut crear
+            
+        Raises:
+            ServerSelectionTimeoutError: Si el servidor no és accessible
+        """
+        collection = self.get_collection(collection_name)
+        try:
+            names = collection.create_indexes([IndexModel(keys) for keys in index_specs])
+        except ServerSelectionTimeoutError:
+            raise
+        except PyMongoError as e:
+            # Sense permisos de createIndex el pipeline continua, però amb COLLSCAN
+            logger.warning("No s'han pogut crear els índexs de %s: %s", collection_name, e)
+            return []
+        
+        logger.info("Índexs assegurats a %s: %s", collection_name, names)
+        return names
+    
     def get_distinct_values(self, collection_name: str, field: str, 
                            query: Optional[Dict] = None) -> List:
         """
@@ -2,6 +2,8 @@
 Script principal per executar el pipeline ETL.
 Punt d'entrada per al processament de dades.
 """
+import argparse
+
 from .pipeline import ETLPipeline
 from .utils import setup_logger
 from .config import LOG_LEVEL, LOG_FORMAT
@@ -11,9 +13,15 @@ def main():
     """Funció principal."""
     logger = setup_logger('main', LOG_LEVEL, LOG_FORMAT)
     
+    parser = argparse.ArgumentParser(description="Pipeline ETL de dades FEB")
+    parser.add_argument('--use-cache', action='store_true',
+                        help="Reutilitza l'extracció desada a la memòria cau "
+                             "(no inclou partits afegits després de desar-la)")
+    args = parser.parse_args()
+    
     logger.info("Iniciant processament de dades FEB")
     
-    pipeline = ETLPipeline()
+    pipeline = ETLPipeline(use_cache=args.use_cache)
     
     try:
         results = pipeline.run()
@@ -3,9 +3,16 @@ Pipeline complet d'ETL.
 Principi SRP: Orquestra el procés complet d'ETL.
 Principi DRY: Evita duplicació usant els mòduls especialitzats.
 """
+import numpy as np
 import pandas as pd
+from pathlib import Path
 from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pymongo.errors import ServerSelectionTimeoutError
+import hashlib
+import json
 import logging
+import re
 
 from ..database import MongoDBClient
 from ..data_processing import DataLoader, DataCleaner, FeatureEngineer, DataAggregator
@@ -16,10 +23,14 @@ from ..config import (
     MIN_GAMES_THRESHOLD, MIN_MINUTES_THRESHOLD, STATS_TO_NORMALIZE,
     INTERIOR_ZONES_MADE, INTERIOR_ZONES_ATTEMPTED,
     EXTERIOR_ZONES_MADE, EXTERIOR_ZONES_ATTEMPTED,
-    FEATURES_FOR_CLUSTERING, FEATURES_FOR_EDA,
+    CLUSTERING_FEATURES_WITH_DER, CLUSTERING_FEATURES_WITHOUT_DER,
+    AGGREGATION_FEATURES_WITH_DER, AGGREGATION_FEATURES_WITHOUT_DER,
     MINUTES_NORMALIZATION, PROCESSED_DATA_DIR, OUTPUT_SCALED_FILE,
     OUTPUT_RAW_FILE, OUTPUT_AGGREGATED_FILE, SCALER_TYPE,
-    HANDLE_INFINITY, FILL_NA_VALUE
+    HANDLE_INFINITY, FILL_NA_VALUE, FREE_THROW_POSSESSION_FACTOR,
+    PLAYER_STATS_PROJECTION, TEAM_STATS_PROJECTION, EXTRACT_CACHE_DIR,
+    COLLECTION_PLAYERS_STATS, COLLECTION_TEAMS_STATS,
+    PLAYERS_STATS_INDEXES, TEAMS_STATS_INDEXES
 )
 
 logger = logging.getLogger(__name__)
@@ -28,16 +39,23 @@ logger = logging.getLogger(__name__)
 class ETLPipeline:
     """Pipeline complet d'ETL per dades de jugadors."""
     
-    def __init__(self, mongo_uri: str = MONGO_URI, db_name: str = DB_NAME):
+    def __init__(self, mongo_uri: str = MONGO_URI, db_name: str = DB_NAME,
+                 use_cache: bool = False):
         """
         Inicialitza el pipeline ETL.
         
         Args:
             mongo_uri: URI de MongoDB
             db_name: Nom de la base de dades
+            use_cache: Si True, reutilitza les extraccions guardades a EXTRACT_CACHE_DIR.
+                Desactivat per defecte: la memòria cau no detecta partits nous
+                (si False, consulta sempre MongoDB i refresca la memòria cau)
         """
         self.mongo_client = MongoDBClient(mongo_uri, db_name)
         self.data_loader = DataLoader(self.mongo_client)
+        self.use_cache = use_cache
+        self.cache_dir = EXTRACT_CACHE_DIR
+        self._indexes_ensured = False
         self.data_cleaner = DataCleaner()
         self.feature_engineer = FeatureEngineer()
         self.data_aggregator = DataAggregator()
@@ -48,45 +66,196 @@ class ETLPipeline:
     
     def connect_database(self) -> bool:
         """
-        Connecta a la base de dades.
+        Connecta a la base de dades i, la primera vegada, assegura els índexs.
         
         Returns:
             True si la connexió és exitosa
         """
-        return self.mongo_client.connect()
+        if not self.mongo_client.connect():
+            return False
+        
+        if not self._indexes_ensured:
+            # Primera operació real contra el servidor: detecta si és inaccessible
+            try:
+                self.mongo_client.ensure_indexes(COLLECTION_PLAYERS_STATS, PLAYERS_STATS_INDEXES)
+                self.mongo_client.ensure_indexes(COLLECTION_TEAMS_STATS, TEAMS_STATS_INDEXES)
+            except ServerSelectionTimeoutError as e:
+                logger.error("Servidor MongoDB inaccessible: %s", e)
+                self.mongo_client.disconnect()
+                return False
+            self._indexes_ensured = True
+        
+        return True
+    
+    def _cache_path(self, season: str, competition: str, name: str,
+                    query: Dict) -> Path:
+        """
+        Retorna la ruta de la memòria cau d'una extracció.
+        
+        Args:
+            season: Temporada
+            competition: Competició
+            name: Nom del conjunt de dades ('players' o 'teams')
+            query: Paràmetres de la consulta (el seu hash forma part del nom)
+            
+        Returns:
+            Ruta de l'arxiu Parquet
+        """
+        # La mateixa consulta contra una altra base de dades no ha de compartir arxiu
+        key_data = {'uri': self.mongo_client.uri, 'db': self.mongo_client.db_name,
+                    'query': query}
+        key = hashlib.blake2b(
+            json.dumps(key_data, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        prefix = re.sub(r'\W+', '_', f"{season}_{competition}")
+        return self.cache_dir / f"{prefix}_{name}_{key}.parquet"
+    
+    def invalidate_cache(self, season: Optional[str] = None,
+                         competition: Optional[str] = None) -> int:
+        """
+        Elimina arxius de la memòria cau d'extracció.
+        
+        Args:
+            season: Temporada a invalidar (None per totes)
+            competition: Competició a invalidar (None per totes; requereix season)
+            
+        Returns:
+            Nombre d'arxius eliminats
+        """
+        if not self.cache_dir.exists():
+            return 0
+        
+        pattern = '*.parquet'
+        if season is not None:
+            parts = [season] if competition is None else [season, competition]
+            pattern = re.sub(r'\W+', '_', '_'.join(parts)) + '_*.parquet'
+        
+        removed = 0
+        for cache_file in self.cache_dir.glob(pattern):
+            cache_file.unlink()
+            removed += 1
+        
+        logger.info("Memòria cau d'extracció invalidada: %d arxius eliminats", removed)
+        return removed
     
     def extract(self, season: str = DEFAULT_SEASON, 
-                competition: str = DEFAULT_COMPETITION) -> Dict[str, pd.DataFrame]:
+                competition: str = DEFAULT_COMPETITION,
+                use_cache: Optional[bool] = None) -> Dict[str, pd.DataFrame]:
         """
         Extreu dades de MongoDB (jugadors i equips).
         
+        Si les dues extraccions són a la memòria cau no es connecta a MongoDB.
+        Tota extracció llegida de MongoDB es desa a la memòria cau, de manera
+        que use_cache=False funciona com a refresc.
+        
         Args:
             season: Temporada a filtrar
             competition: Competició a filtrar
+            use_cache: Si llegir de la memòria cau (None per usar self.use_cache)
             
         Returns:
             Diccionari amb DataFrames de jugadors i equips
         """
-        logger.info(f"Extraient dades: {season} - {competition}")
+        logger.info("Extraient dades: %s - %s", season, competition)
+        use_cache = self.use_cache if use_cache is None else use_cache
         
         query = {
             'season_id': season,
             'competition_name': competition,
             'minutes': {'$gt': 0}  # Filtrar minutes=0 a nivell de query (més eficient)
         }
-        
-        df_players = self.data_loader.load_players_statistics(query)
-        logger.info(f"Extrets {len(df_players)} registres de jugadors")
-        
-        # Carregar estadístiques d'equips per calcular DER
         query_teams = {
             'season_id': season,
             'competition_name': competition
         }
-        df_teams = self.data_loader.load_teams_statistics(query_teams)
-        logger.info(f"Extrets {len(df_teams)} registres d'equips")
         
-        return {'players': df_players, 'teams': df_teams}
+        cache_paths = {
+            'players': self._cache_path(season, competition, 'players', {
+                'query': query, 'fields': PLAYER_STATS_PROJECTION
+            }),
+            'teams': self._cache_path(season, competition, 'teams', {
+                'query': query_teams, 'with_opponents': True,
+                'fields': TEAM_STATS_PROJECTION
+            })
+        }
+        
+        if use_cache and all(path.exists() for path in cache_paths.values()):
+            logger.info("Carregant extracció des de memòria cau: %s", self.cache_dir)
+            return {name: pd.read_parquet(path) for name, path in cache_paths.items()}
+        
+        if not self.mongo_client.is_connected and not self.connect_database():
+            raise RuntimeError("No s'ha pogut connectar a la base de dades")
+        
+        # Les dues consultes són independents: es llancen en paral·lel
+        # (MongoClient és thread-safe i comparteix el pool de connexions)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Find simple: el filtre de partits mínims descarta poques files i
+            # transform ja l'aplica (filter_by_games_played)
+            future_players = executor.submit(
+                self.data_loader.load_players_statistics,
+                query, fields=PLAYER_STATS_PROJECTION
+            )
+            # Estadístiques d'equips per calcular DER
+            future_teams = executor.submit(
+                self.data_loader.load_teams_statistics,
+                query_teams, with_opponents=True, fields=TEAM_STATS_PROJECTION
+            )
+            try:
+                df_players = future_players.result()
+                df_teams = future_teams.result()
+            except ServerSelectionTimeoutError as e:
+                # Sense ping a connect(): aquí és on es detecta un servidor inaccessible
+                raise RuntimeError("No s'ha pogut connectar a la base de dades") from e
+        
+        logger.info("Extrets %d registres de jugadors", len(df_players))
+        logger.info("Extrets %d registres d'equips", len(df_teams))
+        
+        data = {'players': df_players, 'teams': df_teams}
+        
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for name, path in cache_paths.items():
+                data[name].to_parquet(path, engine='pyarrow', compression='zstd', index=False)
+        except Exception as e:
+            logger.warning("No s'ha pogut guardar la memòria cau a %s: %s", self.cache_dir, e)
+        
+        return data
+    
+    @staticmethod
+    def _compute_opponents(df_teams: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula possessions i punts del rival de cada equip a cada partit.
+        
+        Args:
+            df_teams: DataFrame amb estadístiques d'equips per partit
+            
+        Returns:
+            DataFrame amb match_feb_id, team_feb_id, opponent_possessions i opponent_pts
+        """
+        # Calcular possessions dels equips (sobre arrays, sense alineació d'índexs)
+        df_teams = df_teams.assign(team_possessions=(
+            df_teams['fga'].to_numpy() + 
+            (FREE_THROW_POSSESSION_FACTOR * df_teams['fta'].to_numpy()) - 
+            df_teams['orb'].to_numpy() + 
+            df_teams['tov'].to_numpy()
+        ))
+        
+        # Partits amb exactament 2 equips: ordenats per partit, cada parella queda en
+        # files consecutives i el rival d'una fila és l'altra fila de la parella
+        teams_per_match = df_teams.groupby('match_feb_id', sort=False)['team_feb_id'].transform('size')
+        pairs = df_teams.loc[teams_per_match.to_numpy() == 2,
+                             ['match_feb_id', 'team_feb_id', 'team_possessions', 'pts']]
+        pairs = pairs.sort_values('match_feb_id', kind='stable')
+        
+        def swap_pairs(values):
+            return values.reshape(-1, 2)[:, ::-1].ravel()
+        
+        df_opponents = pairs[['match_feb_id', 'team_feb_id']].reset_index(drop=True).assign(
+            opponent_possessions=swap_pairs(pairs['team_possessions'].to_numpy()),
+            opponent_pts=swap_pairs(pairs['pts'].to_numpy())
+        )
+        
+        return df_opponents
     
     def transform(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         """
@@ -100,34 +269,16 @@ class ETLPipeline:
         """
         logger.info("Iniciant transformació de dades")
         
-        df = data['players'].copy()
-        df_teams = data['teams'].copy()
-        
-        # Calcular possessions dels equips
-        from ..config import FREE_THROW_POSSESSION_FACTOR
-        df_teams['team_possessions'] = (
-            df_teams['fga'] + 
-            (FREE_THROW_POSSESSION_FACTOR * df_teams['fta']) - 
-            df_teams['orb'] + 
-            df_teams['tov']
-        )
+        # Sense còpies: amb Copy-on-Write les operacions següents no modifiquen les entrades
+        df = data['players']
+        df_teams = data['teams']
         
-        # Per cada partit, identificar el rival i les seves possessions
-        opponent_data = []
-        for match_id in df['match_feb_id'].unique():
-            teams_in_match = df_teams[df_teams['match_feb_id'] == match_id]
-            
-            if len(teams_in_match) == 2:
-                for idx, team_row in teams_in_match.iterrows():
-                    opponent_row = teams_in_match[teams_in_match['team_feb_id'] != team_row['team_feb_id']].iloc[0]
-                    opponent_data.append({
-                        'match_feb_id': match_id,
-                        'team_feb_id': team_row['team_feb_id'],
-                        'opponent_possessions': opponent_row['team_possessions'],
-                        'opponent_pts': opponent_row['pts']
-                    })
-        
-        df_opponents = pd.DataFrame(opponent_data)
+        if 'opponent_possessions' in df_teams.columns and 'opponent_pts' in df_teams.columns:
+            # Rival ja unit a MongoDB (load_teams_statistics amb with_opponents=True)
+            df_opponents = df_teams[['match_feb_id', 'team_feb_id',
+                                     'opponent_possessions', 'opponent_pts']]
+        else:
+            df_opponents = self._compute_opponents(df_teams)
         
         # Merge amb dades de jugadors
         df = df.merge(df_opponents, on=['match_feb_id', 'team_feb_id'], how='left')
@@ -147,29 +298,20 @@ class ETLPipeline:
             MINUTES_NORMALIZATION
         )
         
-        # Construir llista completa de features a agregar:
-        # 1) FEATURES_FOR_CLUSTERING: 20 features per al model
-        # 2) FEATURES_FOR_EDA: 4 features per anàlisi/visualització (no s'escalen)
-        features_for_clustering = FEATURES_FOR_CLUSTERING.copy()
-        
-        # Validar DER
+        # Llistes de features precalculades a config:
+        # 1) Clustering: 20 features per al model (DER només si es pot calcular)
+        # 2) Agregació: clustering + 4 features per anàlisi/visualització (no s'escalen)
         if 'opponent_possessions' in df.columns and 'opponent_pts' in df.columns and 'der' in df.columns:
-            if 'der' not in features_for_clustering:
-                features_for_clustering.append('der')
+            features_for_clustering = CLUSTERING_FEATURES_WITH_DER
+            all_features_to_aggregate = AGGREGATION_FEATURES_WITH_DER
         else:
-            features_for_clustering = [f for f in features_for_clustering if f != 'der']
+            features_for_clustering = CLUSTERING_FEATURES_WITHOUT_DER
+            all_features_to_aggregate = AGGREGATION_FEATURES_WITHOUT_DER
             logger.warning("DER no es pot calcular - dades de rivals no disponibles")
         
-        # Features EDA: només les que existeixen al DataFrame
-        features_for_eda = [f for f in FEATURES_FOR_EDA if f in df.columns]
-        
-        # Llista completa per agregar (sense duplicats)
-        all_features_to_aggregate = features_for_clustering.copy()
-        for f in features_for_eda:
-            if f not in all_features_to_aggregate:
-                all_features_to_aggregate.append(f)
-        
-        logger.info(f"Features clustering: {len(features_for_clustering)}, EDA: {len(features_for_eda)}, Total: {len(all_features_to_aggregate)}")
+        # Les features EDA que no existeixin al DataFrame les descarta l'agregador
+        logger.info("Features clustering: %d, Total: %d", len(features_for_clustering),
+                    len(all_features_to_aggregate))
         
         # Agregació amb TOTES les features
         df_aggregated = self.data_aggregator.aggregate_by_player(
@@ -178,10 +320,10 @@ class ETLPipeline:
         
         # Seleccionar NOMÉS features de clustering per escalar
         player_info = df_aggregated[['player_feb_id', 'player_name']].copy()
-        features = df_aggregated[features_for_clustering].copy()
+        features = df_aggregated[features_for_clustering].astype(np.float32)
         
-        # Escalat
-        features_scaled, features_clean = self.scaler.fit_transform(
+        # Escalat (les dades originals són el mateix tall de df_aggregated: no es dupliquen)
+        features_scaled, _, _ = self.scaler.fit_transform(
             features, 
             handle_infinity=HANDLE_INFINITY,
             fill_na=FILL_NA_VALUE
@@ -191,7 +333,7 @@ class ETLPipeline:
         
         return {
             'player_info': player_info,
-            'features_raw': features_clean,
+            'features_raw': features,
             'features_scaled': features_scaled,
             'aggregated': df_aggregated,
             'full_data': df_aggregated  # Inclou totes les dades agregades
@@ -206,11 +348,9 @@ class ETLPipeline:
             dataframes: Diccionari amb DataFrames a guardar
             output_dir: Directori de sortida (opcional)
         """
-        from pathlib import Path
-        
         output_path = Path(output_dir) if output_dir else PROCESSED_DATA_DIR
         
-        logger.info(f"Guardant dades a {output_path}")
+        logger.info("Guardant dades a %s", output_path)
         
         # Combinar info del jugador amb features escalades
         df_final_scaled = pd.concat([
@@ -225,19 +365,23 @@ class ETLPipeline:
             OUTPUT_AGGREGATED_FILE: dataframes['aggregated']
         }
         
-        self.file_handler.save_multiple_csv(files_to_save, output_path)
+        self.file_handler.save_multiple(files_to_save, output_path)
         logger.info("Dades guardades correctament")
     
     def run(self, season: str = DEFAULT_SEASON, 
             competition: str = DEFAULT_COMPETITION,
-            output_dir: str = None) -> Dict[str, pd.DataFrame]:
+            output_dir: str = None,
+            use_cache: Optional[bool] = None) -> Dict[str, pd.DataFrame]:
         """
         Executa el pipeline complet d'ETL.
         
+        La connexió a MongoDB s'obre a extract només si la memòria cau no té les dades.
+        
         Args:
             season: Temporada a processar
             competition: Competició a processar
             output_dir: Directori de sortida
+            use_cache: Si llegir de la memòria cau d'extracció (None per usar self.use_cache)
             
         Returns:
             Diccionari amb DataFrames processats
@@ -246,11 +390,8 @@ class ETLPipeline:
         logger.info("INICIANT PIPELINE ETL")
         logger.info("="*60)
         
-        if not self.connect_database():
-            raise RuntimeError("No s'ha pogut connectar a la base de dades")
-        
         try:
-            data_raw = self.extract(season, competition)
+            data_raw = self.extract(season, competition, use_cache)
             dataframes = self.transform(data_raw)
             self.load(dataframes, output_dir)
             
@@ -0,0 +1,70 @@
+"""
+Kernels numèrics per a l'estandardització de característiques.
+Principi SRP: Única responsabilitat de netejar i estandarditzar arrays (z-score).
+
+Si Numba està disponible el kernel es compila (paral·lel per columnes i en
+memòria cau); si no, s'usa una implementació equivalent amb NumPy.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+_EPS = np.finfo(np.float64).eps
+
+
+def _standardize_loop(arr, fill, handle_infinity, out, means, variances, scales):
+    """
+    Neteja i estandarditza cada columna amb una passada de Welford i una d'escriptura.
+
+    NaN (i ±inf si handle_infinity) es reemplacen per fill dins arr i compten
+    com a valors de la columna. Les columnes constants tenen escala 1, igual
+    que StandardScaler de scikit-learn.
+    """
+    n, k = arr.shape
+    for j in prange(k):
+        mean = 0.0
+        m2 = 0.0
+        for i in range(n):
+            x = arr[i, j]
+            if np.isnan(x) or (handle_infinity and np.isinf(x)):
+                arr[i, j] = fill
+                x = arr[i, j]
+            delta = x - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x - mean)
+
+        var = m2 / n if n > 0 else 0.0
+        bound = n * _EPS * var + (n * mean * _EPS) ** 2
+        scale = np.sqrt(var) if var > bound else 1.0
+        means[j] = mean
+        variances[j] = var
+        scales[j] = scale
+
+        for i in range(n):
+            out[i, j] = (arr[i, j] - mean) / scale
+
+
+def _standardize_numpy(arr, fill, handle_infinity, out, means, variances, scales):
+    """Equivalent NumPy de _standardize_loop quan Numba no està disponible."""
+    if handle_infinity:
+        np.nan_to_num(arr, copy=False, nan=fill, posinf=fill, neginf=fill)
+    else:
+        np.nan_to_num(arr, copy=False, nan=fill, posinf=np.inf, neginf=-np.inf)
+
+    n = arr.shape[0]
+    means[:] = arr.mean(axis=0, dtype=np.float64)
+    variances[:] = arr.var(axis=0, dtype=np.float64)
+    bound = n * _EPS * variances + (n * means * _EPS) ** 2
+    scales[:] = np.where(variances > bound, np.sqrt(variances), 1.0)
+    out[:] = (arr - means) / scales
+
+
+# Sense fastmath: el kernel ha de detectar NaN i infinits
+if NUMBA_AVAILABLE:
+    compute_standardize = njit(parallel=True, cache=True)(_standardize_loop)
+else:
+    compute_standardize = _standardize_numpy
@@ -4,10 +4,12 @@ Principi SRP: Única responsabilitat d'escalar i normalitzar dades.
 """
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
+from sklearn.preprocessing import MinMaxScaler
 from typing import Tuple, Optional
 import logging
 
+from ._scaler_kernels import compute_standardize
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,18 +24,112 @@ class DataScaler:
             scaler_type: Tipus d'escalador ('standard' o 'minmax')
         """
         if scaler_type == 'standard':
-            self.scaler = StandardScaler()
+            # L'estandardització la fa el kernel propi; els paràmetres es desen aquí
+            self.scaler = None
         elif scaler_type == 'minmax':
             self.scaler = MinMaxScaler()
         else:
             raise ValueError(f"Tipus d'escalador no vàlid: {scaler_type}")
         
         self.scaler_type = scaler_type
-        logger.info(f"Inicialitzat escalador: {scaler_type}")
+        self.mean_: Optional[np.ndarray] = None
+        self.var_: Optional[np.ndarray] = None
+        self.scale_: Optional[np.ndarray] = None
+        self.n_samples_seen_: Optional[int] = None
+        logger.info("Inicialitzat escalador: %s", scaler_type)
+    
+    @staticmethod
+    def _clean_array(df: pd.DataFrame, handle_infinity: bool,
+                     fill_na: float) -> np.ndarray:
+        """
+        Copia les característiques a un array float32 i neteja NaN/infinits in situ.
+        
+        Args:
+            df: DataFrame amb característiques numèriques
+            handle_infinity: Si True, els infinits també es reemplacen per fill_na
+            fill_na: Valor per omplir NaN
+            
+        Returns:
+            Array float32 contigu sense NaN
+            
+        Raises:
+            ValueError: Si handle_infinity és False i hi ha infinits
+        """
+        arr = np.ascontiguousarray(df.to_numpy(dtype=np.float32, copy=True))
+        if handle_infinity:
+            np.nan_to_num(arr, copy=False, nan=fill_na, posinf=fill_na, neginf=fill_na)
+        else:
+            DataScaler._reject_infinity(arr)
+            np.nan_to_num(arr, copy=False, nan=fill_na, posinf=np.inf, neginf=-np.inf)
+        return arr
+    
+    @staticmethod
+    def _reject_infinity(arr: np.ndarray):
+        """
+        Comprova que l'array no contingui infinits (com fa scikit-learn).
+        
+        Args:
+            arr: Array de característiques
+            
+        Raises:
+            ValueError: Si hi ha algun valor infinit
+        """
+        if np.isinf(arr).any():
+            raise ValueError("Les dades contenen infinits; usa handle_infinity=True per reemplaçar-los")
+    
+    def _check_fitted(self):
+        """
+        Comprova que l'escalador estigui ajustat.
+        
+        Raises:
+            RuntimeError: Si encara no s'ha cridat fit_transform
+        """
+        fitted = self.mean_ is not None if self.scaler is None else hasattr(self.scaler, 'scale_')
+        if not fitted:
+            raise RuntimeError("L'escalador no està ajustat: crida primer fit_transform")
+    
+    def _fit_standardize(self, arr: np.ndarray, handle_infinity: bool,
+                         fill_na: float) -> np.ndarray:
+        """
+        Neteja arr in situ i l'estandarditza amb el kernel fusionat.
+        
+        Els paràmetres ajustats (mean_, var_, scale_) es desen a l'escalador
+        perquè transform i inverse_transform els reutilitzin.
+        
+        Args:
+            arr: Array float32 (es modifica: NaN/infinits reemplaçats)
+            handle_infinity: Si True, els infinits també es reemplacen per fill_na
+            fill_na: Valor per omplir NaN
+            
+        Returns:
+            Array float32 estandarditzat
+            
+        Raises:
+            ValueError: Si handle_infinity és False i hi ha infinits
+        """
+        if not handle_infinity:
+            # El kernel no pot estandarditzar una columna amb infinits
+            self._reject_infinity(arr)
+        
+        n_samples, n_features = arr.shape
+        scaled = np.empty_like(arr)
+        means = np.empty(n_features, dtype=np.float64)
+        variances = np.empty(n_features, dtype=np.float64)
+        scales = np.empty(n_features, dtype=np.float64)
+        
+        compute_standardize(arr, float(fill_na), handle_infinity,
+                            scaled, means, variances, scales)
+        
+        self.mean_ = means
+        self.var_ = variances
+        self.scale_ = scales
+        self.n_samples_seen_ = n_samples
+        
+        return scaled
     
     def fit_transform(self, df: pd.DataFrame, 
                      handle_infinity: bool = True,
-                     fill_na: float = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+                     fill_na: float = 0) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
         """
         Ajusta i transforma les dades.
         
@@ -43,22 +139,30 @@ class DataScaler:
             fill_na: Valor per omplir NaN
             
         Returns:
-            Tupla (dades_escalades, dades_originals_netes)
+            Tupla (dades_escalades, means, scales), on dades_originals_netes =
+            dades_escalades × scales + means (per 'minmax', means és el mínim
+            i scales el rang de cada columna)
         """
-        df_clean = df.copy()
+        if self.scaler_type == 'standard':
+            arr = df.to_numpy(dtype=np.float32, copy=True)
+            scaled_data = self._fit_standardize(arr, handle_infinity, fill_na)
+        else:
+            arr = self._clean_array(df, handle_infinity, fill_na)
+            scaled_data = self.scaler.fit_transform(arr)
         
         if handle_infinity:
-            df_clean = df_clean.replace([np.inf, -np.inf], np.nan)
-            logger.info("Valors infinits reemplaçats amb NaN")
+            logger.info("Valors infinits reemplaçats amb %s", fill_na)
+        logger.info("Valors NaN omplerts amb %s", fill_na)
         
-        df_clean = df_clean.fillna(fill_na)
-        logger.info(f"Valors NaN omplerts amb {fill_na}")
+        df_scaled = pd.DataFrame(scaled_data, columns=df.columns, copy=False)
         
-        scaled_data = self.scaler.fit_transform(df_clean)
-        df_scaled = pd.DataFrame(scaled_data, columns=df_clean.columns)
+        if self.scaler_type == 'standard':
+            means, scales = self.mean_, self.scale_
+        else:
+            means, scales = self.scaler.data_min_, self.scaler.data_range_
         
-        logger.info(f"Dades escalades: {df_scaled.shape}")
-        return df_scaled, df_clean
+        logger.info("Dades escalades: %s", df_scaled.shape)
+        return df_scaled, means, scales
     
     def transform(self, df: pd.DataFrame,
                  handle_infinity: bool = True,
@@ -74,15 +178,17 @@ class DataScaler:
         Returns:
             DataFrame escalat
         """
-        df_clean = df.copy()
+        self._check_fitted()
+        arr = self._clean_array(df, handle_infinity, fill_na)
         
-        if handle_infinity:
-            df_clean = df_clean.replace([np.inf, -np.inf], np.nan)
-        
-        df_clean = df_clean.fillna(fill_na)
-        
-        scaled_data = self.scaler.transform(df_clean)
-        df_scaled = pd.DataFrame(scaled_data, columns=df_clean.columns)
+        if self.scaler is None:
+            # arr és una còpia pròpia: s'estandarditza in situ
+            np.subtract(arr, self.mean_, out=arr, casting='unsafe')
+            np.divide(arr, self.scale_, out=arr, casting='unsafe')
+            scaled_data = arr
+        else:
+            scaled_data = self.scaler.transform(arr)
+        df_scaled = pd.DataFrame(scaled_data, columns=df.columns, copy=False)
         
         return df_scaled
     
@@ -96,7 +202,14 @@ class DataScaler:
         Returns:
             DataFrame en escala original
         """
-        original_data = self.scaler.inverse_transform(df_scaled)
+        self._check_fitted()
+        
+        if self.scaler is None:
+            original_data = df_scaled.to_numpy(dtype=np.float32, copy=True)
+            np.multiply(original_data, self.scale_, out=original_data, casting='unsafe')
+            np.add(original_data, self.mean_, out=original_data, casting='unsafe')
+        else:
+            original_data = self.scaler.inverse_transform(df_scaled)
         df_original = pd.DataFrame(original_data, columns=df_scaled.columns)
         
         return df_original
@@ -4,6 +4,7 @@ Principi SRP: Única responsabilitat de llegir i escriure arxius.
 """
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,7 +22,7 @@ class FileHandler:
             directory: Ruta del directori
         """
         directory.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Directori assegurat: {directory}")
+        logger.info("Directori assegurat: %s", directory)
     
     @staticmethod
     def save_csv(df: pd.DataFrame, filepath: Path, index: bool = False):
@@ -35,7 +36,7 @@ class FileHandler:
         """
         FileHandler.ensure_directory_exists(filepath.parent)
         df.to_csv(filepath, index=index)
-        logger.info(f"Arxiu guardat: {filepath}")
+        logger.info("Arxiu guardat: %s", filepath)
     
     @staticmethod
     def load_csv(filepath: Path) -> pd.DataFrame:
@@ -49,21 +50,140 @@ class FileHandler:
             DataFrame carregat
         """
         df = pd.read_csv(filepath)
-        logger.info(f"Arxiu carregat: {filepath} ({len(df)} registres)")
+        logger.info("Arxiu carregat: %s (%d registres)", filepath, len(df))
         return df
     
     @staticmethod
-    def save_multiple_csv(dataframes: dict, base_dir: Path, index: bool = False):
+    def save_parquet(df: pd.DataFrame, filepath: Path, index: bool = False):
         """
-        Guarda múltiples DataFrames en CSV.
+        Guarda DataFrame en Parquet (pyarrow, compressió zstd).
+        
+        Args:
+            df: DataFrame a guardar
+            filepath: Ruta de l'arxiu
+            index: Si incloure l'índex
+        """
+        FileHandler.ensure_directory_exists(filepath.parent)
+        df.to_parquet(filepath, engine='pyarrow', compression='zstd', index=index)
+        logger.info("Arxiu guardat: %s", filepath)
+    
+    @staticmethod
+    def load_parquet(filepath: Path) -> pd.DataFrame:
+        """
+        Carrega DataFrame des de Parquet.
+        
+        Args:
+            filepath: Ruta de l'arxiu
+            
+        Returns:
+            DataFrame carregat
+        """
+        df = pd.read_parquet(filepath, engine='pyarrow')
+        logger.info("Arxiu carregat: %s (%d registres)", filepath, len(df))
+        return df
+    
+    @staticmethod
+    def save_feather(df: pd.DataFrame, filepath: Path, index: bool = False):
+        """
+        Guarda DataFrame en Feather v2 (compressió zstd).
+        
+        Args:
+            df: DataFrame a guardar
+            filepath: Ruta de l'arxiu
+            index: Si incloure l'índex (Feather només admet l'índex per defecte)
+        """
+        FileHandler.ensure_directory_exists(filepath.parent)
+        df.reset_index(drop=not index).to_feather(filepath, compression='zstd')
+        logger.info("Arxiu guardat: %s", filepath)
+    
+    @staticmethod
+    def load_feather(filepath: Path) -> pd.DataFrame:
+        """
+        Carrega DataFrame des de Feather.
+        
+        Args:
+            filepath: Ruta de l'arxiu
+            
+        Returns:
+            DataFrame carregat
+        """
+        df = pd.read_feather(filepath)
+        logger.info("Arxiu carregat: %s (%d registres)", filepath, len(df))
+        return df
+    
+    @staticmethod
+    def save(df: pd.DataFrame, filepath: Path, index: bool = False):
+        """
+        Guarda DataFrame en el format indicat per l'extensió (.parquet, .feather o .csv).
+        
+        Args:
+            df: DataFrame a guardar
+            filepath: Ruta de l'arxiu
+            index: Si incloure l'índex
+            
+        Raises:
+            ValueError: Si l'extensió no està suportada
+        """
+        suffix = filepath.suffix.lower()
+        if suffix == '.parquet':
+            FileHandler.save_parquet(df, filepath, index)
+        elif suffix == '.feather':
+            FileHandler.save_feather(df, filepath, index)
+        elif suffix == '.csv':
+            FileHandler.save_csv(df, filepath, index)
+        else:
+            raise ValueError(f"Format d'arxiu no suportat: {filepath.suffix}")
+    
+    @staticmethod
+    def load(filepath: Path) -> pd.DataFrame:
+        """
+        Carrega DataFrame segons l'extensió de l'arxiu (.parquet, .feather o .csv).
+        
+        Args:
+            filepath: Ruta de l'arxiu
+            
+        Returns:
+            DataFrame carregat
+            
+        Raises:
+            ValueError: Si l'extensió no està suportada
+        """
+        suffix = filepath.suffix.lower()
+        if suffix == '.parquet':
+            return FileHandler.load_parquet(filepath)
+        if suffix == '.feather':
+            return FileHandler.load_feather(filepath)
+        if suffix == '.csv':
+            return FileHandler.load_csv(filepath)
+        raise ValueError(f"Format d'arxiu no suportat: {filepath.suffix}")
+    
+    @staticmethod
+    def save_multiple(dataframes: dict, base_dir: Path, index: bool = False):
+        """
+        Guarda múltiples DataFrames, cadascun en el format de la seva extensió.
+        
+        Les escriptures són independents i es fan en paral·lel (pyarrow i
+        el writer de CSV alliberen el GIL mentre codifiquen).
         
         Args:
             dataframes: Diccionari {nom_arxiu: dataframe}
             base_dir: Directori base
             index: Si incloure l'índex
         """
-        for filename, df in dataframes.items():
-            filepath = base_dir / filename
-            FileHandler.save_csv(df, filepath, index)
+        if not dataframes:
+            return
+        
+        FileHandler.ensure_directory_exists(base_dir)
+        with ThreadPoolExecutor(max_workers=min(4, len(dataframes))) as executor:
+            futures = [
+                executor.submit(FileHandler.save, df, base_dir / filename, index)
+                for filename, df in dataframes.items()
+            ]
+            for future in futures:
+                future.result()  # Propaga qualsevol error d'escriptura
         
-        logger.info(f"Guardats {len(dataframes)} arxius a {base_dir}")
+        logger.info("Guardats %d arxius a %s", len(dataframes), base_dir)
+    
+    # Compatibilitat: el format ara el decideix l'extensió de cada arxiu
+    save_multiple_csv = save_multiple
+